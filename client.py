@@ -9,26 +9,52 @@ Usage:
 """
 
 import asyncio
-import argparse
+import sys
 import traceback
 from src.core import LiveClient
-from src.config import Config
+from src.config import load_config
+
+try:
+    import uvloop  # Optional: faster event loop on Linux/macOS
+except ImportError:
+    uvloop = None
+
+VIDEO_MODES = ("camera", "screen", "both", "none")
+
+def parse_mode(argv):
+    """Parse the single --mode option (argparse is avoided to keep startup light)"""
+    mode = None
+    args = iter(argv)
+    for arg in args:
+        if arg in ("-h", "--help"):
+            print(__doc__)
+            sys.exit(0)
+        elif arg == "--mode":
+            mode = next(args, "")
+        elif arg.startswith("--mode="):
+            mode = arg.partition("=")[2]
+        else:
+            sys.exit(f"error: unrecognized argument: {arg}")
+
+    if mode is not None and mode not in VIDEO_MODES:
+        sys.exit(f"error: --mode must be one of: {', '.join(VIDEO_MODES)}")
+    return mode
 
 def main():
-    parser = argparse.ArgumentParser(description="Gemini Live API with screen/camera sharing")
-    parser.add_argument(
-        "--mode",
-        type=str,
-        default=Config.DEFAULT_VIDEO_MODE,
-        help="Video input mode",
-        choices=["camera", "screen", "both", "none"],
-    )
+    mode = parse_mode(sys.argv[1:])
 
-    args = parser.parse_args()
+    try:
+        config = load_config()
+    except ValueError as e:
+        print(e)
+        return
 
     try:
-        client = LiveClient(video_mode=args.mode)
-        asyncio.run(client.run())
+        client = LiveClient(config, video_mode=mode)
+        if uvloop is not None:
+            uvloop.run(client.run())
+        else:
+            asyncio.run(client.run())
     except KeyboardInterrupt:
         print("\n👋 Exiting...")
     except Exception as e:
@@ -9,6 +9,6 @@ __version__ = "1.0.0"
 __author__ = "Gemini Live Client"
 
 from .core import LiveClient
-from .config import Config
+from .config import Config, load_config
 
-__all__ = ["LiveClient", "Config"]
+__all__ = ["LiveClient", "Config", "load_config"]
@@ -1,56 +1,132 @@
 import asyncio
-import pyaudio
-from ..config import Config
+import threading
 
 class AudioManager:
     """Manages audio input/output for the Live API session"""
-    
-    def __init__(self):
-        self.pya = pyaudio.PyAudio()
+
+    def __init__(self, config):
+        self.config = config
+        self.loop = None
         self.audio_stream = None
         self.output_stream = None
         self.audio_in_queue = None
         self.out_queue = None
-        
+        self._sd = None  # sounddevice module, imported when the first stream opens
+
+        self._input_stream_kwargs = {
+            "samplerate": self.config.SEND_SAMPLE_RATE,
+            "channels": self.config.CHANNELS,
+            "dtype": self.config.DTYPE,
+            "blocksize": self.config.CHUNK_SIZE,
+        }
+        self._output_stream_kwargs = {
+            "samplerate": self.config.RECEIVE_SAMPLE_RATE,
+            "channels": self.config.CHANNELS,
+            "dtype": self.config.DTYPE,
+        }
+
+        # Pre-allocated microphone batch buffer, only touched from the PortAudio input thread
+        self._mic_batch_bytes = self.config.CHUNK_SIZE * self.config.CHANNELS * 2 * self.config.MIC_BATCH_CHUNKS
+        self._mic_buffer = bytearray(self._mic_batch_bytes)
+        self._mic_view = memoryview(self._mic_buffer)
+        self._mic_fill = 0
+
+        # Playback ring buffer, filled from audio_in_queue and drained by the
+        # PortAudio output callback. It is kept short (~200 ms) so unplayed
+        # audio stays in audio_in_queue where interruptions can discard it.
+        self._playback_buffer = bytearray()
+        self._playback_lock = threading.Lock()
+        self._playback_limit = self.config.RECEIVE_SAMPLE_RATE * 2 // 5
+        self._playback_waiting = False
+        self._playback_ready = asyncio.Event()
+
     async def setup_audio_queues(self, audio_in_queue, out_queue):
         """Initialize audio queues"""
+        self.loop = asyncio.get_running_loop()
         self.audio_in_queue = audio_in_queue
         self.out_queue = out_queue
-        
+
+    def _sounddevice(self):
+        """Import sounddevice on first use; it loads PortAudio, so keep it off startup"""
+        if self._sd is None:
+            import sounddevice as sd
+
+            self._input_stream_kwargs["device"] = sd.query_devices(kind="input")["index"]
+            self._sd = sd
+        return self._sd
+
+    def _mic_cb(self, indata, frames, time, status):
+        """PortAudio input callback - batches captured PCM for the event loop"""
+        batch_bytes = self._mic_batch_bytes
+        start = self._mic_fill
+        end = start + len(indata)
+        if end > batch_bytes:
+            self._flush_mic()
+            start, end = 0, len(indata)
+
+        self._mic_view[start:end] = indata
+        self._mic_fill = end
+
+        if end >= batch_bytes:
+            self._flush_mic()
+
+    def _flush_mic(self):
+        """Hand the batched microphone PCM to the event loop and reuse the buffer"""
+        if self._mic_fill:
+            self.loop.call_soon_threadsafe(
+                self.out_queue.put_nowait, bytes(self._mic_view[:self._mic_fill])
+            )
+            self._mic_fill = 0
+
     async def listen_audio(self):
         """Capture audio from microphone and send to output queue"""
-        mic_info = self.pya.get_default_input_device_info()
-        self.audio_stream = await asyncio.to_thread(
-            self.pya.open,
-            format=getattr(pyaudio, Config.FORMAT),
-            channels=Config.CHANNELS,
-            rate=Config.SEND_SAMPLE_RATE,
-            input=True,
-            input_device_index=mic_info["index"],
-            frames_per_buffer=Config.CHUNK_SIZE,
+        self.audio_stream = self._sounddevice().RawInputStream(
+            callback=self._mic_cb, **self._input_stream_kwargs
         )
-        
-        kwargs = {"exception_on_overflow": False} if __debug__ else {}
-        
-        while True:
-            data = await asyncio.to_thread(
-                self.audio_stream.read, Config.CHUNK_SIZE, **kwargs
-            )
-            await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
+
+        with self.audio_stream:
+            # PortAudio delivers buffers from its own thread; just stay alive
+            await asyncio.Event().wait()
+
+    def _speaker_cb(self, outdata, frames, time, status):
+        """PortAudio output callback - plays buffered PCM, pads with silence"""
+        size = len(outdata)
+        with self._playback_lock:
+            available = min(size, len(self._playback_buffer))
+            outdata[:available] = self._playback_buffer[:available]
+            del self._playback_buffer[:available]
+            wake = self._playback_waiting and len(self._playback_buffer) < self._playback_limit
+            if wake:
+                self._playback_waiting = False
+        if wake:
+            self.loop.call_soon_threadsafe(self._playback_ready.set)
+        if available < size:
+            outdata[available:] = b"\x00" * (size - available)
 
     async def play_audio(self):
         """Play audio from input queue"""
-        self.output_stream = await asyncio.to_thread(
-            self.pya.open,
-            format=getattr(pyaudio, Config.FORMAT),
-            channels=Config.CHANNELS,
-            rate=Config.RECEIVE_SAMPLE_RATE,
-            output=True,
+        self.output_stream = self._sounddevice().RawOutputStream(
+            callback=self._speaker_cb, **self._output_stream_kwargs
         )
-        
-        while True:
-            bytestream = await self.audio_in_queue.get()
-            await asyncio.to_thread(self.output_stream.write, bytestream)
+
+        # Bind hot-loop attributes once
+        get = self.audio_in_queue.get
+        buffer = self._playback_buffer
+        lock = self._playback_lock
+        limit = self._playback_limit
+        ready = self._playback_ready
+
+        with self.output_stream:
+            while True:
+                bytestream = await get()
+                with lock:
+                    buffer += bytestream
+                    full = len(buffer) >= limit
+                    if full:
+                        ready.clear()
+                        self._playback_waiting = True
+                if full:
+                    await ready.wait()
 
     def cleanup(self):
         """Clean up audio resources"""
@@ -59,6 +135,5 @@ class AudioManager:
                 self.audio_stream.close()
             if self.output_stream:
                 self.output_stream.close()
-            self.pya.terminate()
         except Exception as e:
             print(f"❌ Error during audio cleanup: {e}")
@@ -1,92 +1,148 @@
 import os
+from dataclasses import dataclass, fields
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+QUOTA_ERROR_MESSAGE = """
+🚨 API Quota Exceeded!
 
+The Gemini API quota has been exceeded. This could mean:
+1. You've reached your free tier limit
+2. Billing issues with your Google Cloud account
+3. Daily/monthly quota limits reached
+
+Solutions:
+1. Check your Google AI Studio billing: https://aistudio.google.com/
+2. Wait for quota reset (if daily limit)
+3. Upgrade your plan if needed
+4. Try using a different API key
+
+Error details: You exceeded your current quota, please check your plan and billing details.
+"""
+
+DEFAULT_INITIAL_PROMPT = """
+Your name is Raven and you are a multimodal AI assistant and you have spent over 10 years specializing in web security and application security. You collaborate regularly with other bounty hunters to identify, exploit, and document vulnerabilities in web applications, APIs, and server configurations. You possess deep hands-on expertise in areas such as XSS, SQLi, IDOR, CSRF, SSRF, open redirect, authentication bypasses, and misconfigurations in real-world applications. 
+
+Objective:
+Your job is to act like a real human security collaborator and assist me as I perform a live bug bounty hunting session. You will simulate real-time collaboration by providing hands-on support with recon, vulnerability discovery, exploitation, PoC creation, report writing, and tool selection in the mean time I give you access to see my screen and hear my voice in real-time.
+"""
+
+def _parse_flag(value):
+    """Parse a true/false environment variable"""
+    return value.lower() == "true"
+
+@dataclass(frozen=True, slots=True)
 class Config:
+    """Application settings, snapshotted once from the environment by load_config()"""
+
     # API Configuration
-    GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-    MODEL_NAME = os.getenv("MODEL_NAME", "models/gemini-2.5-flash-preview-native-audio-dialog")
+    GEMINI_API_KEY: str | None = None
+    MODEL_NAME: str = "models/gemini-2.5-flash-preview-native-audio-dialog"
     
     # Fallback models (in order of preference) Implement later
     # These models are used if the primary model is not available or quota is exceeded
-    FALLBACK_MODELS = [
+    FALLBACK_MODELS: tuple = (
         "models/gemini-2.5-flash-exp-native-audio-thinking-dialog",
         "models/gemini-2.0-flash-live-001"
-    ]
+    )
+    
+    # Connection retries (per model) with exponential backoff and jitter
+    CONNECT_RETRIES: int = 3
+    RETRY_BASE_DELAY: float = 1.0
+    RETRY_MAX_DELAY: float = 30.0
+    RETRY_JITTER: float = 0.5
     
     # Audio Configuration
-    FORMAT = "paInt16"
-    CHANNELS = 1
-    SEND_SAMPLE_RATE = 16000
-    RECEIVE_SAMPLE_RATE = 24000
-    CHUNK_SIZE = 1024
+    DTYPE: str = "int16"
+    CHANNELS: int = 1
+    SEND_SAMPLE_RATE: int = 16000
+    RECEIVE_SAMPLE_RATE: int = 24000
+    CHUNK_SIZE: int = 1024
+    # Received audio buffered ahead of playback. The server sends a turn's speech in bursts
+    # that run well ahead of real time, so this must hold a whole burst; interruptions
+    # clear it, and only audio beyond it is dropped
+    AUDIO_IN_BUFFER_SECONDS: float = 30.0
+    # Microphone chunks sent per message; each chunk is CHUNK_SIZE / SEND_SAMPLE_RATE
+    # seconds (64 ms), so 2 chunks add at most 128 ms of batching latency
+    MIC_BATCH_CHUNKS: int = 2
     
     # Video Configuration
-    DEFAULT_VIDEO_MODE = os.getenv("DEFAULT_VIDEO_MODE", "screen")
-    MEDIA_RESOLUTION = "MEDIA_RESOLUTION_MEDIUM"  # Options: LOW, MEDIUM, HIGH
+    DEFAULT_VIDEO_MODE: str = "screen"
+    MEDIA_RESOLUTION: str = "MEDIA_RESOLUTION_MEDIUM"  # Options: LOW, MEDIUM, HIGH
     
     # Image Processing
-    IMAGE_QUALITY = 85
-    SCREEN_QUALITY = 75
-    MAX_IMAGE_SIZE = (1024, 1024)
-    MAX_SCREEN_SIZE = (1920, 1080)
+    IMAGE_QUALITY: int = 85
+    SCREEN_QUALITY: int = 75
+    MAX_IMAGE_SIZE: tuple = (1024, 1024)
+    MAX_SCREEN_SIZE: tuple = (1920, 1080)
+    # A screen frame is only sent when at least SCREEN_CHANGE_MIN_PIXELS pixels of its
+    # 64x36 thumbnail differ from the last sent one by more than SCREEN_CHANGE_DELTA (0-255)
+    # in some color channel; one thumbnail pixel covers ~30x30 px of a 1080p screen
+    SCREEN_CHANGE_DELTA: int = 8
+    SCREEN_CHANGE_MIN_PIXELS: int = 1
 
     # Timing
-    CAMERA_CAPTURE_INTERVAL = 2.0
-    SCREEN_CAPTURE_INTERVAL = 3.0
+    CAMERA_CAPTURE_INTERVAL: float = 2.0
+    SCREEN_CAPTURE_INTERVAL: float = 3.0
     
     # Real-time Display Configuration
-    ENABLE_REAL_TIME_DISPLAY = True
-    DISPLAY_TYPING_INDICATOR = True
-    CONVERSATION_SEPARATOR = "-" * 40
+    ENABLE_REAL_TIME_DISPLAY: bool = True
+    DISPLAY_TYPING_INDICATOR: bool = True
+    CONVERSATION_SEPARATOR: str = "-" * 40
+    # Streamed response text is written out in batches of this many characters or seconds
+    TEXT_FLUSH_CHARS: int = 64
+    TEXT_FLUSH_INTERVAL: float = 0.05
     
     # Google Search Configuration
-    ENABLE_GOOGLE_SEARCH = os.getenv("ENABLE_GOOGLE_SEARCH", "true").lower() == "true"
-    SEARCH_RESULTS_LIMIT = int(os.getenv("SEARCH_RESULTS_LIMIT", "5"))
+    ENABLE_GOOGLE_SEARCH: bool = True
+    SEARCH_RESULTS_LIMIT: int = 5
     
     # Turn Coverage Configuration
-    TURN_COVERAGE = os.getenv("TURN_COVERAGE", "TURN_INCLUDES_ALL_INPUT")  # Options: TURN_INCLUDES_ALL_INPUT, TURN_INCLUDES_LAST_INPUT
+    TURN_COVERAGE: str = "TURN_INCLUDES_ALL_INPUT"  # Options: TURN_INCLUDES_ALL_INPUT, TURN_INCLUDES_LAST_INPUT
     
     # Dialog Management
-    AUTO_END_TURN = os.getenv("AUTO_END_TURN", "true").lower() == "true"
-    CONVERSATION_MEMORY = int(os.getenv("CONVERSATION_MEMORY", "50"))  # Number of messages to keep in memory
+    AUTO_END_TURN: bool = True
+    CONVERSATION_MEMORY: int = 50  # Number of messages to keep in memory
     
     # Error handling
-    QUOTA_ERROR_MESSAGE = """
-🚨 API Quota Exceeded!
+    QUOTA_ERROR_MESSAGE: str = QUOTA_ERROR_MESSAGE
+    
+    # Initial Prompt Configuration
+    ENABLE_INITIAL_PROMPT: bool = True
+    INITIAL_PROMPT: str = DEFAULT_INITIAL_PROMPT.strip()
+    CUSTOM_INITIAL_PROMPT_FILE: str | None = None
 
-The Gemini API quota has been exceeded. This could mean:
-1. You've reached your free tier limit
-2. Billing issues with your Google Cloud account
-3. Daily/monthly quota limits reached
+    @property
+    def AUDIO_IN_QUEUE_BYTES(self):
+        """Received audio buffered for playback, in bytes of 16-bit PCM"""
+        return int(self.AUDIO_IN_BUFFER_SECONDS * self.RECEIVE_SAMPLE_RATE * 2 * self.CHANNELS)
 
-Solutions:
-1. Check your Google AI Studio billing: https://aistudio.google.com/
-2. Wait for quota reset (if daily limit)
-3. Upgrade your plan if needed
-4. Try using a different API key
+    @classmethod
+    def from_env(cls):
+        """Build configuration from environment variables, falling back to the field defaults"""
+        # Read defaults from the fields; with slots the class attributes are descriptors
+        defaults = {field.name: field.default for field in fields(cls)}
 
-Error details: You exceeded your current quota, please check your plan and billing details.
-"""
-    
-    # Initial Prompt Configuration
-    ENABLE_INITIAL_PROMPT = os.getenv("ENABLE_INITIAL_PROMPT", "true").lower() == "true"
-    INITIAL_PROMPT = os.getenv("INITIAL_PROMPT",
-"""
-Your name is Raven and you are a multimodal AI assistant and you have spent over 10 years specializing in web security and application security. You collaborate regularly with other bounty hunters to identify, exploit, and document vulnerabilities in web applications, APIs, and server configurations. You possess deep hands-on expertise in areas such as XSS, SQLi, IDOR, CSRF, SSRF, open redirect, authentication bypasses, and misconfigurations in real-world applications. 
+        def env(name, parse=str):
+            value = os.getenv(name)
+            return defaults[name] if value is None else parse(value)
 
-Objective:
-Your job is to act like a real human security collaborator and assist me as I perform a live bug bounty hunting session. You will simulate real-time collaboration by providing hands-on support with recon, vulnerability discovery, exploitation, PoC creation, report writing, and tool selection in the mean time I give you access to see my screen and hear my voice in real-time.
-""").strip()
-    
-    CUSTOM_INITIAL_PROMPT_FILE = os.getenv("CUSTOM_INITIAL_PROMPT_FILE", None)
+        return cls(
+            GEMINI_API_KEY=env("GEMINI_API_KEY"),
+            MODEL_NAME=env("MODEL_NAME"),
+            DEFAULT_VIDEO_MODE=env("DEFAULT_VIDEO_MODE"),
+            ENABLE_GOOGLE_SEARCH=env("ENABLE_GOOGLE_SEARCH", _parse_flag),
+            SEARCH_RESULTS_LIMIT=env("SEARCH_RESULTS_LIMIT", int),
+            TURN_COVERAGE=env("TURN_COVERAGE"),
+            AUTO_END_TURN=env("AUTO_END_TURN", _parse_flag),
+            CONVERSATION_MEMORY=env("CONVERSATION_MEMORY", int),
+            ENABLE_INITIAL_PROMPT=env("ENABLE_INITIAL_PROMPT", _parse_flag),
+            INITIAL_PROMPT=env("INITIAL_PROMPT", str.strip),
+            CUSTOM_INITIAL_PROMPT_FILE=env("CUSTOM_INITIAL_PROMPT_FILE"),
+        )
     
-    @classmethod
-    def validate(cls):
+    def validate(self):
         """Validate that required configuration is present"""
-        if not cls.GEMINI_API_KEY:
+        if not self.GEMINI_API_KEY:
             raise ValueError("""
 ❌ GEMINI_API_KEY environment variable is required!
 
@@ -99,23 +155,25 @@ To fix this:
 """)
         return True
     
-    @classmethod
-    def get_quota_error_message(cls):
+    def get_quota_error_message(self):
         """Get formatted quota error message"""
-        return cls.QUOTA_ERROR_MESSAGE
+        return self.QUOTA_ERROR_MESSAGE
     
-    @classmethod
-    def get_initial_prompt(cls):
+    def get_initial_prompt(self):
         """Get the initial prompt, either from file or environment variable"""
-        if cls.CUSTOM_INITIAL_PROMPT_FILE and os.path.exists(cls.CUSTOM_INITIAL_PROMPT_FILE):
+        if self.CUSTOM_INITIAL_PROMPT_FILE and os.path.exists(self.CUSTOM_INITIAL_PROMPT_FILE):
             try:
-                with open(cls.CUSTOM_INITIAL_PROMPT_FILE, 'r', encoding='utf-8') as f:
+                with open(self.CUSTOM_INITIAL_PROMPT_FILE, 'r', encoding='utf-8') as f:
                     return f.read().strip()
             except Exception as e:
                 print(f"⚠️ Warning: Could not read custom prompt file: {e}")
                 print("📋 Using default initial prompt instead")
         
-        return cls.INITIAL_PROMPT if cls.ENABLE_INITIAL_PROMPT else None
+        return self.INITIAL_PROMPT if self.ENABLE_INITIAL_PROMPT else None
 
-# Validate configuration on import
-Config.validate()
+def load_config():
+    """Load environment variables (including .env) into a validated Config"""
+    load_dotenv()
+    config = Config.from_env()
+    config.validate()
+    return config
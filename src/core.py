@@ -1,25 +1,181 @@
 import asyncio
+import os
+import sys
 import traceback
 import websockets.exceptions
-from .config import Config
 from .audio import AudioManager
 from .video import VideoManager
 from .session import SessionManager
+from .queues import DropOldestQueue
+
+QUIT_COMMANDS = frozenset(("q", "quit"))
 
 class LiveClient:
     """Main client that orchestrates all components of the Gemini Live API"""
     
-    def __init__(self, video_mode=Config.DEFAULT_VIDEO_MODE):
-        self.video_mode = video_mode
+    def __init__(self, config, video_mode=None):
+        self.config = config
+        self.video_mode = video_mode or config.DEFAULT_VIDEO_MODE
         
         # Initialize managers
-        self.audio_manager = AudioManager()
-        self.video_manager = VideoManager(video_mode)
-        self.session_manager = SessionManager()
+        self.audio_manager = AudioManager(config)
+        self.video_manager = VideoManager(config, self.video_mode)
+        self.session_manager = SessionManager(config)
         
         # Queues
         self.audio_in_queue = None
         self.out_queue = None
+
+        # Console input, assembled into lines from raw stdin reads
+        self._stdin_fd = None
+        self._stdin_buffer = bytearray()
+        self._stdin_eof = False
+        self._stdin_waiter = None
+        # Windows' event loop cannot watch console handles; read via input() in a thread
+        self._stdin_threaded = sys.platform == "win32"
+
+        # Console commands, dispatched by exact (casefolded) match
+        self.conversation_count = 0
+        self._status_state = None
+        self._status_text = ""
+        self._commands = {
+            "camera off": lambda: self._toggle_camera(False),
+            "camera on": lambda: self._toggle_camera(True),
+            "screen off": lambda: self._toggle_screen(False),
+            "screen on": lambda: self._toggle_screen(True),
+            "search off": lambda: self._toggle_search(False),
+            "search on": lambda: self._toggle_search(True),
+            "clear": self._clear_conversation,
+            "history": self._print_history,
+            "prompt": self._print_prompt,
+            "status": self._print_status,
+        }
+
+    def _on_stdin(self):
+        """Event loop reader callback - buffers whatever stdin has available"""
+        # stdin stays blocking (on a TTY it shares its file description with
+        # stdout); the loop only calls us once it is readable, so one read won't block
+        chunk = os.read(self._stdin_fd, 4096)
+
+        if chunk:
+            self._stdin_buffer += chunk
+        else:
+            # EOF stays readable forever; stop watching once seen
+            self._stdin_eof = True
+            asyncio.get_running_loop().remove_reader(self._stdin_fd)
+
+        if self._stdin_waiter and not self._stdin_waiter.done():
+            self._stdin_waiter.set_result(None)
+
+    async def _read_line(self, prompt):
+        """Read a line from stdin without tying up a worker thread"""
+        loop = asyncio.get_running_loop()
+        if self._stdin_fd is None and not self._stdin_threaded:
+            fd = sys.stdin.fileno()
+            try:
+                loop.add_reader(fd, self._on_stdin)
+            except (PermissionError, NotImplementedError):
+                # epoll refuses regular files and /dev/null (e.g. `client.py < script.txt`)
+                self._stdin_threaded = True
+            else:
+                self._stdin_fd = fd
+
+        if self._stdin_threaded:
+            return await asyncio.to_thread(input, prompt)
+
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+
+        while (end := self._stdin_buffer.find(b"\n")) < 0:
+            if self._stdin_eof:
+                if not self._stdin_buffer:
+                    raise EOFError
+                # Like input(), return a last line that has no trailing newline
+                end = len(self._stdin_buffer)
+                break
+            self._stdin_waiter = loop.create_future()
+            await self._stdin_waiter
+
+        line = self._stdin_buffer[:end]
+        del self._stdin_buffer[:end + 1]
+        return line.decode(sys.stdin.encoding or "utf-8", errors="replace").rstrip("\r")
+
+    def _close_stdin(self):
+        """Detach stdin from the event loop"""
+        if self._stdin_fd is None:
+            return
+        try:
+            asyncio.get_running_loop().remove_reader(self._stdin_fd)
+        except RuntimeError:
+            pass
+        self._stdin_fd = None
+
+    def _toggle_camera(self, enabled):
+        """Handle 'camera on/off' command"""
+        self.video_manager.toggle_camera(enabled)
+        print(f"📷 Camera {'enabled' if enabled else 'disabled'}")
+
+    def _toggle_screen(self, enabled):
+        """Handle 'screen on/off' command"""
+        self.video_manager.toggle_screen(enabled)
+        print(f"🖥️ Screen sharing {'enabled' if enabled else 'disabled'}")
+
+    def _toggle_search(self, enabled):
+        """Handle 'search on/off' command"""
+        self.session_manager.toggle_search(enabled)
+        print(f"🔍 Google Search {'enabled' if enabled else 'disabled'}")
+
+    def _clear_conversation(self):
+        """Handle 'clear' command"""
+        self.session_manager.conversation_history.clear()
+        print("\n" + "🧹 Conversation cleared" + "\n")
+        self.conversation_count = 0
+
+    def _print_history(self):
+        """Handle 'history' command"""
+        summary = self.session_manager.get_conversation_summary()
+        print(f"\n📊 Conversation Summary: {summary}\n")
+
+    def _print_prompt(self):
+        """Handle 'prompt' command"""
+        initial_prompt = self.config.get_initial_prompt()
+        if initial_prompt:
+            print(f"\n🎯 Current Initial Prompt:")
+            print(f"{'='*50}")
+            print(initial_prompt)
+            print(f"{'='*50}\n")
+        else:
+            print("\n❌ No initial prompt configured\n")
+
+    def _print_status(self):
+        """Handle 'status' command"""
+        # Rebuild the report only when something it shows has changed
+        state = (
+            self.video_manager.camera_enabled,
+            self.video_manager.screen_enabled,
+            self.session_manager.search_enabled,
+            self.conversation_count,
+            len(self.session_manager.conversation_history),
+        )
+        if state != self._status_state:
+            camera, screen, search, count, memory = state
+            self._status_text = "\n".join([
+                f"\n📊 Current Status:",
+                f"  🎥 Mode: {self.video_mode}",
+                f"  📷 Camera: {'✅ enabled' if camera else '❌ disabled'}",
+                f"  🖥️  Screen: {'✅ enabled' if screen else '❌ disabled'}",
+                f"  🔍 Search: {'✅ enabled' if search else '❌ disabled'}",
+                f"  ⚙️  Code Execution: ✅ enabled",
+                f"  🎯 Initial Prompt: {'✅ enabled' if self.config.ENABLE_INITIAL_PROMPT else '❌ disabled'}",
+                f"  💬 Messages: {count}",
+                f"  🔄 Turn Coverage: {self.config.TURN_COVERAGE}",
+                f"  📝 Memory: {memory} messages",
+                "\n",
+            ])
+            self._status_state = state
+
+        sys.stdout.write(self._status_text)
+        sys.stdout.flush()
         
     async def send_text(self):
         """Handle text input from user with improved real-time interaction"""
@@ -42,89 +198,44 @@ class LiveClient:
         print(f"🖥️  Screen: {'✅ enabled' if self.video_manager.screen_enabled else '❌ disabled'}")
         print(f"🔍 Search: {'✅ enabled' if self.session_manager.search_enabled else '❌ disabled'}")
         print(f"⚙️  Code Execution: ✅ enabled")
-        print(f"🎯 Initial Prompt: {'✅ enabled' if Config.ENABLE_INITIAL_PROMPT else '❌ disabled'}")
-        print(f"💬 Turn Coverage: {Config.TURN_COVERAGE}")
+        print(f"🎯 Initial Prompt: {'✅ enabled' if self.config.ENABLE_INITIAL_PROMPT else '❌ disabled'}")
+        print(f"💬 Turn Coverage: {self.config.TURN_COVERAGE}")
         print("="*50 + "\n")
 
-        conversation_count = 0
+        self.conversation_count = 0
 
         while True:
             try:
                 # Show user prompt
-                text = await asyncio.to_thread(input, "👤 You: ")
+                text = await self._read_line("👤 You: ")
+                command = text.strip().casefold()
 
-                if text.lower() in ["q", "quit"]:
+                if command in QUIT_COMMANDS:
                     print("👋 Goodbye!")
                     break
-                elif text.lower() == "camera off":
-                    self.video_manager.toggle_camera(False)
-                    print("📷 Camera disabled")
-                    continue
-                elif text.lower() == "camera on":
-                    self.video_manager.toggle_camera(True)
-                    print("📷 Camera enabled")
-                    continue
-                elif text.lower() == "screen off":
-                    self.video_manager.toggle_screen(False)
-                    print("🖥️ Screen sharing disabled")
-                    continue
-                elif text.lower() == "screen on":
-                    self.video_manager.toggle_screen(True)
-                    print("🖥️ Screen sharing enabled")
-                    continue
-                elif text.lower() == "search off":
-                    self.session_manager.toggle_search(False)
-                    print("🔍 Google Search disabled")
-                    continue
-                elif text.lower() == "search on":
-                    self.session_manager.toggle_search(True)
-                    print("🔍 Google Search enabled")
-                    continue
-                elif text.lower() == "clear":
-                    self.session_manager.conversation_history.clear()
-                    print("\n" + "🧹 Conversation cleared" + "\n")
-                    conversation_count = 0
-                    continue
-                elif text.lower() == "history":
-                    summary = self.session_manager.get_conversation_summary()
-                    print(f"\n📊 Conversation Summary: {summary}\n")
-                    continue
-                elif text.lower() == "prompt":
-                    initial_prompt = Config.get_initial_prompt()
-                    if initial_prompt:
-                        print(f"\n🎯 Current Initial Prompt:")
-                        print(f"{'='*50}")
-                        print(initial_prompt)
-                        print(f"{'='*50}\n")
-                    else:
-                        print("\n❌ No initial prompt configured\n")
-                    continue
-                elif text.lower() == "status":
-                    print(f"\n📊 Current Status:")
-                    print(f"  🎥 Mode: {self.video_mode}")
-                    print(f"  📷 Camera: {'✅ enabled' if self.video_manager.camera_enabled else '❌ disabled'}")
-                    print(f"  🖥️  Screen: {'✅ enabled' if self.video_manager.screen_enabled else '❌ disabled'}")
-                    print(f"  🔍 Search: {'✅ enabled' if self.session_manager.search_enabled else '❌ disabled'}")
-                    print(f"  ⚙️  Code Execution: ✅ enabled")
-                    print(f"  🎯 Initial Prompt: {'✅ enabled' if Config.ENABLE_INITIAL_PROMPT else '❌ disabled'}")
-                    print(f"  💬 Messages: {conversation_count}")
-                    print(f"  🔄 Turn Coverage: {Config.TURN_COVERAGE}")
-                    print(f"  📝 Memory: {len(self.session_manager.conversation_history)} messages")
-                    print()
+
+                handler = self._commands.get(command)
+                if handler:
+                    handler()
                     continue
 
                 if text.strip():
-                    conversation_count += 1
+                    self.conversation_count += 1
                     # Send message with context using enhanced method
                     await self.session_manager.send_message_with_context(
                         text, 
-                        end_of_turn=Config.AUTO_END_TURN
+                        end_of_turn=self.config.AUTO_END_TURN
                     )
                     
-                    # Brief pause to let the AI response start
-                    await asyncio.sleep(0.1)
+                    # Let the AI response start before prompting again
+                    try:
+                        await asyncio.wait_for(
+                            self.session_manager.response_started.wait(), timeout=0.5
+                        )
+                    except asyncio.TimeoutError:
+                        pass
 
-            except KeyboardInterrupt:
+            except (KeyboardInterrupt, EOFError):
                 print("\n\n👋 Interrupted by user")
                 break
             except Exception as e:
@@ -134,82 +245,84 @@ class LiveClient:
         """Main execution loop"""
         print(f"\n🚀 Starting Gemini Live API")
         print(f"📱 Mode: {self.video_mode}")
-        print(f"🔑 API Key: {'✅ Loaded' if Config.GEMINI_API_KEY else '❌ Missing'}")
-        print(f"🤖 Model: {Config.MODEL_NAME}")
-        print(f"🔍 Google Search: {'✅ Enabled' if Config.ENABLE_GOOGLE_SEARCH else '❌ Disabled'}")
-        print(f"🎯 Initial Prompt: {'✅ Enabled' if Config.ENABLE_INITIAL_PROMPT else '❌ Disabled'}")
-        print(f"🔄 Turn Coverage: {Config.TURN_COVERAGE}")
+        print(f"🔑 API Key: {'✅ Loaded' if self.config.GEMINI_API_KEY else '❌ Missing'}")
+        print(f"🤖 Model: {self.config.MODEL_NAME}")
+        print(f"🔍 Google Search: {'✅ Enabled' if self.config.ENABLE_GOOGLE_SEARCH else '❌ Disabled'}")
+        print(f"🎯 Initial Prompt: {'✅ Enabled' if self.config.ENABLE_INITIAL_PROMPT else '❌ Disabled'}")
+        print(f"🔄 Turn Coverage: {self.config.TURN_COVERAGE}")
 
         try:
-            # Get the connection context manager
-            connection_manager = await self.session_manager.try_connect_with_fallbacks()
-            
             async with (
-                connection_manager as session,
+                self.session_manager.try_connect_with_fallbacks() as session,
                 asyncio.TaskGroup() as tg,
             ):
-                print("✅ Connected to Gemini Live API successfully!")
-                if Config.ENABLE_GOOGLE_SEARCH:
-                    print("🔍 Google Search tools loaded and ready!")
-                print("⚙️ Code execution capabilities enabled!")
-
-                # Initialize queues
-                self.audio_in_queue = asyncio.Queue()
-                self.out_queue = asyncio.Queue(maxsize=5)
-
-                # Setup managers
-                await self.session_manager.setup_session(session, self.audio_in_queue)
-                await self.audio_manager.setup_audio_queues(self.audio_in_queue, self.out_queue)
-                await self.video_manager.setup_video_queue(self.out_queue)
-
-                # Create tasks
-                send_text_task = tg.create_task(self.send_text())
-                tg.create_task(self.session_manager.send_realtime(self.out_queue))
-                tg.create_task(self.audio_manager.listen_audio())
-
-                # Video tasks based on mode
-                if self.video_mode == "camera":
-                    tg.create_task(self.video_manager.get_frames())
-                elif self.video_mode == "screen":
-                    tg.create_task(self.video_manager.get_screen())
-                elif self.video_mode == "both":
-                    tg.create_task(self.video_manager.get_frames())
-                    tg.create_task(self.video_manager.get_screen())
-
-                tg.create_task(self.session_manager.receive_audio())
-                tg.create_task(self.audio_manager.play_audio())
-
-                await send_text_task
-                raise asyncio.CancelledError("User requested exit")
+                try:
+                    print("✅ Connected to Gemini Live API successfully!")
+                    if self.config.ENABLE_GOOGLE_SEARCH:
+                        print("🔍 Google Search tools loaded and ready!")
+                    print("⚙️ Code execution capabilities enabled!")
+
+                    # Initialize queues
+                    self.audio_in_queue = DropOldestQueue(maxbytes=self.config.AUDIO_IN_QUEUE_BYTES)
+                    self.out_queue = DropOldestQueue(maxsize=5)
+
+                    # Setup managers
+                    await self.session_manager.setup_session(session, self.audio_in_queue)
+                    await self.audio_manager.setup_audio_queues(self.audio_in_queue, self.out_queue)
+                    await self.video_manager.setup_video_session(session)
+
+                    # Create tasks
+                    send_text_task = tg.create_task(self.send_text())
+                    tg.create_task(self.session_manager.send_realtime(self.out_queue))
+                    tg.create_task(self.audio_manager.listen_audio())
+
+                    # Video tasks for the enabled sources; toggles start/stop them later
+                    self.video_manager.start_tasks()
+
+                    tg.create_task(self.session_manager.receive_audio())
+                    tg.create_task(self.audio_manager.play_audio())
+
+                    await send_text_task
+                    raise asyncio.CancelledError("User requested exit")
+                finally:
+                    # Capture tasks live outside the TaskGroup; stop them before the
+                    # connection closes so no frame is sent to a dead session
+                    await self.video_manager.aclose()
 
         except asyncio.CancelledError:
             print("👋 Exiting...")
-        except websockets.exceptions.ConnectionClosedError as e:
-            if "quota" in str(e).lower() or "1011" in str(e):
-                print("🚨 QUOTA EXCEEDED ERROR")
-                print(Config.get_quota_error_message())
-                print("\n💡 Quick fixes:")
-                print("\n1. Wait a few hours for quota reset")
-                print("2. Try a different API key")
-                print("3. Check your billing at https://aistudio.google.com/")
-            else:
-                print(f"❌ Connection error: {e}")
         except Exception as e:
-            if "quota" in str(e).lower():
+            # A single failing task surfaces from the TaskGroup wrapped in a group
+            if isinstance(e, ExceptionGroup) and len(e.exceptions) == 1:
+                e = e.exceptions[0]
+
+            if isinstance(e, websockets.exceptions.ConnectionClosedError):
+                if "quota" in str(e).lower() or "1011" in str(e):
+                    print("🚨 QUOTA EXCEEDED ERROR")
+                    print(self.config.get_quota_error_message())
+                    print("\n💡 Quick fixes:")
+                    print("\n1. Wait a few hours for quota reset")
+                    print("2. Try a different API key")
+                    print("3. Check your billing at https://aistudio.google.com/")
+                else:
+                    print(f"❌ Connection error: {e}")
+            elif "quota" in str(e).lower():
                 print("🚨 QUOTA EXCEEDED ERROR")
-                print(Config.get_quota_error_message())
+                print(self.config.get_quota_error_message())
             elif "All models" in str(e) or "All available models" in str(e):
                 pass  # Error message already printed
             else:
                 print(f"❌ Unexpected error: {e}")
                 traceback.print_exc()
         finally:
+            await self.video_manager.aclose()
             self.cleanup()
             print("🛑 Application terminated\n")
 
     def cleanup(self):
         """Clean up all resources"""
         try:
+            self._close_stdin()
             self.audio_manager.cleanup()
             print("🧹 Cleanup completed")
         except Exception as e:
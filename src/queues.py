@@ -0,0 +1,49 @@
+import asyncio
+import collections
+
+class DropOldestQueue:
+    """Minimal single-consumer queue for real-time media on one event loop
+
+    Items are kept in a deque and the consumer is woken through a single
+    event, skipping asyncio.Queue's per-waiter future bookkeeping. When
+    maxsize is set the oldest item is dropped to make room, so producers
+    never block. With maxbytes set the queue holds byte strings instead and
+    drops the oldest ones while their total length exceeds the budget (the
+    newest item is always kept). Producers must run on the event loop
+    thread (use loop.call_soon_threadsafe from other threads).
+    """
+
+    __slots__ = ("_items", "_ready", "_maxbytes", "_nbytes")
+
+    def __init__(self, maxsize=0, maxbytes=0):
+        self._items = collections.deque(maxlen=maxsize or None)
+        self._ready = asyncio.Event()
+        self._maxbytes = maxbytes
+        self._nbytes = 0
+
+    def qsize(self):
+        return len(self._items)
+
+    def put_nowait(self, item):
+        """Append an item, evicting the oldest ones if the queue is full"""
+        items = self._items
+        if self._maxbytes:
+            self._nbytes += len(item)
+            while self._nbytes > self._maxbytes and items:
+                self._nbytes -= len(items.popleft())
+        items.append(item)
+        self._ready.set()
+
+    def clear(self):
+        """Drop every queued item at once"""
+        self._items.clear()
+        self._nbytes = 0
+
+    async def get(self):
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        item = self._items.popleft()
+        if self._maxbytes:
+            self._nbytes -= len(item)
+        return item
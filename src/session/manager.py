@@ -1,38 +1,53 @@
 import asyncio
+import collections
+import contextlib
+import itertools
+import random
+import sys
 import websockets.exceptions
 from google import genai
 from google.genai import types
-from ..config import Config
+
+def _retry_after(error):
+    """Get the server's Retry-After delay in seconds from an error, if it sent one"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
 
 class SessionManager:
     """Manages Gemini Live API session and communication"""
     
-    def __init__(self):
+    def __init__(self, config):
+        self.config = config
+
         # Initialize Gemini client
         self.client = genai.Client(
             http_options={"api_version": "v1beta"},
-            api_key=Config.GEMINI_API_KEY,
+            api_key=self.config.GEMINI_API_KEY,
         )
         
         # Setup tools based on configuration
         tools = []
-        if Config.ENABLE_GOOGLE_SEARCH:
+        if self.config.ENABLE_GOOGLE_SEARCH:
             tools.append(types.Tool(google_search=types.GoogleSearch()))
         
         # Get initial prompt for system instruction
-        initial_prompt = Config.get_initial_prompt() if Config.ENABLE_INITIAL_PROMPT else None
+        initial_prompt = self.config.get_initial_prompt() if self.config.ENABLE_INITIAL_PROMPT else None
         
         # Live API Configuration
         config_kwargs = {
             "response_modalities": ["AUDIO"],
-            "media_resolution": Config.MEDIA_RESOLUTION,
+            "media_resolution": self.config.MEDIA_RESOLUTION,
             "speech_config": types.SpeechConfig(
                 voice_config=types.VoiceConfig(
                     prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Sadachbia")
                 )
             ),
             "realtime_input_config": types.RealtimeInputConfig(
-                turn_coverage=Config.TURN_COVERAGE
+                turn_coverage=self.config.TURN_COVERAGE
             ),
             "context_window_compression": types.ContextWindowCompressionConfig(
                 trigger_tokens=25600,
@@ -51,19 +66,31 @@ class SessionManager:
         if tools:
             config_kwargs["tools"] = tools
             
-        self.config = types.LiveConnectConfig(**config_kwargs)
+        self.live_config = types.LiveConnectConfig(**config_kwargs)
         
         self.session = None
         self.audio_in_queue = None
+        self._session_ready = asyncio.Event()  # Set once setup_session has run
         self.is_ai_speaking = False
+        self.response_started = asyncio.Event()  # Set on the first response of each turn
         self.current_response = ""
-        self.conversation_history = []
-        self.search_enabled = Config.ENABLE_GOOGLE_SEARCH
+        # Oldest messages fall off automatically once CONVERSATION_MEMORY is reached
+        self.conversation_history = collections.deque(maxlen=self.config.CONVERSATION_MEMORY)
+        self.search_enabled = self.config.ENABLE_GOOGLE_SEARCH
+
+        # Streamed response text waiting to be written to the console
+        self._pending_text = []
+        self._pending_text_size = 0
+        self._last_text_flush = 0.0
+        self._text_flush_handle = None  # Timer that flushes text left pending
+        self._text_flush_chars = self.config.TEXT_FLUSH_CHARS
+        self._text_flush_interval = self.config.TEXT_FLUSH_INTERVAL
         
     async def setup_session(self, session, audio_in_queue):
         """Initialize session and audio queue"""
         self.session = session
         self.audio_in_queue = audio_in_queue
+        self._session_ready.set()
         
     def toggle_search(self, enabled):
         """Toggle Google Search on/off"""
@@ -73,10 +100,6 @@ class SessionManager:
     def add_to_conversation_history(self, role, content):
         """Add message to conversation history with memory management"""
         self.conversation_history.append({"role": role, "content": content})
-        
-        # Keep only recent messages to manage memory
-        if len(self.conversation_history) > Config.CONVERSATION_MEMORY:
-            self.conversation_history = self.conversation_history[-Config.CONVERSATION_MEMORY:]
     
     async def send_message_with_context(self, message, end_of_turn=True):
         """Send message with conversation context"""
@@ -91,18 +114,49 @@ class SessionManager:
             print(f"❌ Error sending message: {e}")
 
     async def send_realtime(self, out_queue):
-        """Send real-time data to the session"""
+        """Send queued microphone audio to the session"""
         while True:
-            msg = await out_queue.get()
-            await self.session.send(input=msg)
+            data = await out_queue.get()
+            # Microphone PCM is queued as raw bytes and only wrapped at send time
+            await self.session.send(input={"data": data, "mime_type": "audio/pcm"})
+
+    def _flush_text(self, now):
+        """Write buffered response text to the console in one call"""
+        if self._text_flush_handle is not None:
+            self._text_flush_handle.cancel()
+            self._text_flush_handle = None
+        if self._pending_text:
+            sys.stdout.write("".join(self._pending_text))
+            sys.stdout.flush()
+            self._pending_text.clear()
+            self._pending_text_size = 0
+        self._last_text_flush = now
+
+    def _maybe_flush_text(self, now):
+        """Flush buffered response text once it is large or old enough"""
+        if (
+            self._pending_text_size >= self._text_flush_chars
+            or now - self._last_text_flush >= self._text_flush_interval
+        ):
+            self._flush_text(now)
+        elif self._text_flush_handle is None:
+            # Don't leave the text hidden if the stream pauses (tool call, slow generation)
+            loop = asyncio.get_running_loop()
+            self._text_flush_handle = loop.call_later(
+                self._text_flush_interval, self._flush_pending_text, loop
+            )
+
+    def _flush_pending_text(self, loop):
+        """Timer callback - flush text that no later message has flushed"""
+        self._text_flush_handle = None
+        self._flush_text(loop.time())
 
     async def receive_audio(self):
         """Receive audio and text from the session with real-time display and search support"""
+        loop = asyncio.get_running_loop()
+        await self._session_ready.wait()
+        attempt = 0
         while True:
-            if not self.session:
-                await asyncio.sleep(0.1)  # Wait for session to be initialized
-                continue
-
             try:
                 turn = self.session.receive()
                 self.current_response = ""
@@ -112,14 +166,20 @@ class SessionManager:
                 code_execution_shown = False
                 
                 async for response in turn:
+                    self.response_started.set()
+
                     # Handle audio data
                     if data := response.data:
+                        # Holds a whole burst of speech; cleared on interruption below
                         self.audio_in_queue.put_nowait(data)
+                        if self._pending_text:
+                            self._maybe_flush_text(loop.time())
                         continue
                     
                     # Handle tool calls (Google Search)
                     if hasattr(response, 'tool_call') and response.tool_call and self.search_enabled:
                         if not search_results_shown:
+                            self._flush_text(loop.time())
                             print(f"\n🔍 Performing Google Search...")
                             search_results_shown = True
                         continue
@@ -127,6 +187,7 @@ class SessionManager:
                     # Handle executable code
                     if hasattr(response, 'executable_code') and response.executable_code:
                         if not code_execution_shown:
+                            self._flush_text(loop.time())
                             print(f"\n⚙️ Processing request...")
                             code_execution_shown = True
                         continue
@@ -145,12 +206,15 @@ class SessionManager:
                                 self.is_ai_speaking = True
                             response_started = True
                         
-                        # Print text in real-time
-                        print(text, end="", flush=True)
+                        # Print text in near real-time, batching small fragments
+                        self._pending_text.append(text)
+                        self._pending_text_size += len(text)
+                        self._maybe_flush_text(loop.time())
                         self.current_response += text
                         has_content = True
 
                 # End of turn - finish the response
+                self._flush_text(loop.time())
                 if self.is_ai_speaking and has_content:
                     print("")  # New line after complete response
                     
@@ -162,46 +226,75 @@ class SessionManager:
                     # Show prompt again for next user input
                     await asyncio.sleep(0.1)  # Small delay for better UX
                 
+                self.response_started.clear()
+
                 # Clear audio queue on interruption
-                while not self.audio_in_queue.empty():
-                    self.audio_in_queue.get_nowait()
-                    
+                self.audio_in_queue.clear()
+                attempt = 0
+
+            except websockets.exceptions.ConnectionClosed:
+                raise  # The session is gone; retrying receive() cannot recover it
             except Exception as e:
                 print(f"\n❌ Error in receive_audio: {e}")
-                await asyncio.sleep(0.5)  # Brief pause before retrying
+                await asyncio.sleep(self._retry_delay(attempt, e))
+                attempt += 1
 
     def get_conversation_summary(self):
         """Get a summary of recent conversation"""
         if not self.conversation_history:
             return "No conversation history"
         
-        recent_messages = self.conversation_history[-10:]  # Last 10 messages
-        user_messages = len([msg for msg in recent_messages if msg["role"] == "user"])
-        ai_messages = len([msg for msg in recent_messages if msg["role"] == "assistant"])
+        # Last 10 messages, counted in a single pass without slicing
+        recent_messages = itertools.islice(reversed(self.conversation_history), 10)
+        roles = collections.Counter(msg["role"] for msg in recent_messages)
         
-        return f"Recent: {user_messages} user messages, {ai_messages} AI responses"
+        return f"Recent: {roles['user']} user messages, {roles['assistant']} AI responses"
 
+    def _retry_delay(self, attempt, error=None):
+        """Exponential backoff with jitter, honoring a server-provided Retry-After"""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(self.config.RETRY_MAX_DELAY, retry_after)
+        delay = self.config.RETRY_BASE_DELAY * (2 ** attempt)
+        delay *= 1 + random.random() * self.config.RETRY_JITTER
+        return min(self.config.RETRY_MAX_DELAY, delay)
+
+    @contextlib.asynccontextmanager
     async def try_connect_with_fallbacks(self):
-        """Try to connect with fallback models if quota exceeded"""
-        models_to_try = [Config.MODEL_NAME] + Config.FALLBACK_MODELS
+        """Open a session, falling back to other models if quota exceeded"""
+        async with contextlib.AsyncExitStack() as stack:
+            yield await self._connect_with_fallbacks(stack)
+
+    async def _connect_with_fallbacks(self, stack):
+        """Enter the first model connection that succeeds onto the exit stack"""
+        models_to_try = [self.config.MODEL_NAME, *self.config.FALLBACK_MODELS]
         
         for model in models_to_try:
-            try:
-                print(f"🔄 Trying to connect with model: {model}")
-                return self.client.aio.live.connect(model=model, config=self.config)
-            except websockets.exceptions.ConnectionClosedError as e:
-                if "quota" in str(e).lower() or "1011" in str(e):
-                    print(f"❌ Quota exceeded for model: {model}")
+            for attempt in range(self.config.CONNECT_RETRIES):
+                try:
+                    print(f"🔄 Trying to connect with model: {model}")
+                    # connect() only returns a context manager; errors surface on enter
+                    connection = self.client.aio.live.connect(model=model, config=self.live_config)
+                    return await stack.enter_async_context(connection)
+                except websockets.exceptions.ConnectionClosedError as e:
+                    if "quota" in str(e).lower() or "1011" in str(e):
+                        print(f"❌ Quota exceeded for model: {model}")
+                        # Quota closes are often transient; retry the same model first
+                        if attempt + 1 < self.config.CONNECT_RETRIES:
+                            delay = self._retry_delay(attempt, e)
+                            print(f"⏳ Retrying {model} in {delay:.1f}s...")
+                            await asyncio.sleep(delay)
+                            continue
+                        if model == models_to_try[-1]:
+                            print(self.config.get_quota_error_message())
+                            raise Exception("All models exhausted due to quota limits")
+                        break
+                    else:
+                        raise e
+                except Exception as e:
+                    print(f"❌ Failed to connect with {model}: {e}")
                     if model == models_to_try[-1]:
-                        print(Config.get_quota_error_message())
-                        raise Exception("All models exhausted due to quota limits")
-                    continue
-                else:
-                    raise e
-            except Exception as e:
-                print(f"❌ Failed to connect with {model}: {e}")
-                if model == models_to_try[-1]:
-                    error_msg = f"""
+                        error_msg = f"""
 🚨 CRITICAL ERROR: All Models Failed!
 
 Error Type: {type(e).__name__}
@@ -223,8 +316,8 @@ Troubleshooting steps:
 
 Exiting application...
 """
-                    print(error_msg)
-                    raise Exception("All available models failed to connect")
-                continue
+                        print(error_msg)
+                        raise Exception("All available models failed to connect")
+                    break
         
         raise Exception("Failed to connect with any available model")
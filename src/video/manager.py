@@ -1,69 +1,205 @@
 import asyncio
-import base64
-import io
+import concurrent.futures
+import threading
+import time
 import cv2
-import PIL.Image
 import mss
-from ..config import Config
+import numpy as np
+from google.genai import types
+from ..queues import DropOldestQueue
+
+def _encode_jpeg(image, max_size, quality, optimize=False):
+    """Downscale a BGR/BGRA array to fit max_size and JPEG-encode it with OpenCV"""
+    height, width = image.shape[:2]
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    if scale < 1.0:
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    if image.ndim == 3 and image.shape[2] == 4:
+        # Drop alpha after downscaling, when there are fewer pixels to convert
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+    if optimize:
+        params += [int(cv2.IMWRITE_JPEG_OPTIMIZE), 1]
+    ok, buffer = cv2.imencode(".jpg", image, params)
+    return buffer.tobytes() if ok else None
 
 class VideoManager:
     """Manages video capture from camera and screen"""
     
-    def __init__(self, video_mode=Config.DEFAULT_VIDEO_MODE):
-        self.video_mode = video_mode
-        self.camera_enabled = video_mode in ["camera", "both"]
-        self.screen_enabled = video_mode in ["screen", "both"]
-        self.out_queue = None
+    def __init__(self, config, video_mode=None):
+        self.config = config
+        self.video_mode = video_mode or config.DEFAULT_VIDEO_MODE
+        self.camera_enabled = self.video_mode in ["camera", "both"]
+        self.screen_enabled = self.video_mode in ["screen", "both"]
+
+        # Per-frame settings bound once for the capture hot paths
+        self._max_image_size = config.MAX_IMAGE_SIZE
+        self._image_quality = config.IMAGE_QUALITY
+        self._max_screen_size = config.MAX_SCREEN_SIZE
+        self._screen_quality = config.SCREEN_QUALITY
+        self._screen_change_delta = config.SCREEN_CHANGE_DELTA
+        self._screen_change_min_pixels = config.SCREEN_CHANGE_MIN_PIXELS
+        self.session = None
+        self._tasks = {}  # Running capture task per source ("camera" / "screen")
+        self._backing_off = False
+        self._camera_thread = None  # Latest camera capture thread and its stop event
+        self._camera_stop = None
+
+        # Screen grabs run on their own worker instead of the shared default executor
+        self._screen_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="vid-screen"
+        )
+
+        # mss instances are not thread-safe, so keep one per capture thread
+        self._sct_local = threading.local()
+        self._sct_instances = []
+        self._last_screen_thumb = None  # Thumbnail of the last screen frame sent
         
-    async def setup_video_queue(self, out_queue):
-        """Initialize video output queue"""
-        self.out_queue = out_queue
+    async def setup_video_session(self, session):
+        """Initialize the session frames are sent to"""
+        self.session = session
+
+    def start_tasks(self):
+        """Start capture tasks for the sources that are currently enabled"""
+        if self.camera_enabled:
+            self._start_task("camera")
+        if self.screen_enabled:
+            self._start_task("screen")
+
+    def _start_task(self, source):
+        """Start a source's capture task unless it is already running or there is no session yet"""
+        task = self._tasks.get(source)
+        if self.session is None or (task and not task.done()):
+            return
+        capture = self.get_frames if source == "camera" else self.get_screen
+        self._tasks[source] = asyncio.get_running_loop().create_task(capture())
+
+    def _stop_task(self, source):
+        """Cancel a source's capture task, if running"""
+        task = self._tasks.pop(source, None)
+        if task:
+            task.cancel()
         
     def toggle_camera(self, enabled):
         """Toggle camera on/off"""
         self.camera_enabled = enabled
+        if enabled:
+            self._start_task("camera")
+        else:
+            # Stopping the task also releases the camera device
+            self._stop_task("camera")
         
     def toggle_screen(self, enabled):
         """Toggle screen sharing on/off"""
         self.screen_enabled = enabled
+        if enabled:
+            # Always send the first frame after sharing resumes
+            self._last_screen_thumb = None
+            self._start_task("screen")
+        else:
+            self._stop_task("screen")
         
+    def _capture_interval(self, base, backlog):
+        """Stretch a capture interval while earlier frames are still waiting to be sent"""
+        if backlog and not self._backing_off:
+            print("\n🐢 Uplink is behind, slowing camera capture")
+        self._backing_off = bool(backlog)
+        return base * (1 + backlog)
+
     def _get_frame(self, cap):
-        """Capture and process camera frame"""
-        if not self.camera_enabled:
+        """Decode and process the most recently grabbed camera frame"""
+        ret, frame = cap.retrieve()
+        if not ret:
             return None
 
-        ret, frame = cap.read()
-        if not ret:
+        image_bytes = _encode_jpeg(frame, self._max_image_size, self._image_quality)
+        if image_bytes is None:
             return None
 
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = PIL.Image.fromarray(frame_rgb)
-        img.thumbnail(Config.MAX_IMAGE_SIZE)
+        return types.Blob(mime_type="image/jpeg", data=image_bytes)
 
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg", quality=Config.IMAGE_QUALITY)
-        image_io.seek(0)
+    def _camera_loop(self, loop, slot, stop):
+        """Camera thread: keep the capture buffer drained and publish frames on schedule"""
+        cap = cv2.VideoCapture(0)
+        try:
+            if not cap.isOpened():
+                print("❌ Error in get_frames: could not open camera")
+                return
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
 
-        mime_type = "image/jpeg"
-        image_bytes = image_io.read()
-        return {"mime_type": mime_type, "data": base64.b64encode(image_bytes).decode()}
+            next_capture = 0.0
+            while not stop.is_set():
+                if not self.camera_enabled:
+                    stop.wait(self.config.CAMERA_CAPTURE_INTERVAL)
+                    continue
 
-    async def get_frames(self):
-        """Camera capture loop"""
-        cap = await asyncio.to_thread(cv2.VideoCapture, 0)
+                # Grab continuously so the frame we encode is never stale
+                if not cap.grab():
+                    stop.wait(0.1)
+                    continue
 
-        try:
-            while True:
-                if self.camera_enabled:
-                    frame = await asyncio.to_thread(self._get_frame, cap)
+                now = time.monotonic()
+                if now >= next_capture:
+                    # An unsent frame still in the slot means the uplink is behind
+                    next_capture = now + self._capture_interval(
+                        self.config.CAMERA_CAPTURE_INTERVAL, slot.qsize()
+                    )
+                    frame = self._get_frame(cap)
                     if frame:
-                        await self.out_queue.put(frame)
-
-                await asyncio.sleep(Config.CAMERA_CAPTURE_INTERVAL)
+                        loop.call_soon_threadsafe(slot.put_nowait, frame)
         except Exception as e:
             print(f"❌ Error in get_frames: {e}")
         finally:
             cap.release()
+            # Wake get_frames so its task ends along with this thread
+            try:
+                loop.call_soon_threadsafe(slot.put_nowait, None)
+            except RuntimeError:
+                pass  # Event loop already closed
+
+    async def get_frames(self):
+        """Camera capture loop"""
+        # A previous capture thread may still hold the device; wait for it to release it
+        previous = self._camera_thread
+        if previous is not None and previous.is_alive():
+            self._camera_stop.set()
+            await asyncio.to_thread(previous.join)
+
+        # Single-slot hand-off: a newer frame replaces one not yet sent
+        slot = DropOldestQueue(maxsize=1)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._camera_loop,
+            args=(asyncio.get_running_loop(), slot, stop),
+            name="camera-capture",
+            daemon=True,
+        )
+        self._camera_thread, self._camera_stop = thread, stop
+        thread.start()
+
+        try:
+            # None means the capture thread has exited
+            while (frame := await slot.get()) is not None:
+                try:
+                    await self.session.send(input=frame)
+                except Exception as e:
+                    print(f"❌ Error in get_frames: {e}")
+                    await asyncio.sleep(1.0)
+        finally:
+            stop.set()
+
+    def _get_sct(self):
+        """Get this thread's mss instance and capture monitor, creating them on first use"""
+        local = self._sct_local
+        sct = getattr(local, "sct", None)
+        if sct is None:
+            sct = mss.mss()
+            local.sct = sct
+            local.monitor = sct.monitors[1] if len(sct.monitors) > 1 else sct.monitors[0]
+            self._sct_instances.append(sct)
+        return sct, local.monitor
 
     def _get_screen(self):
         """Capture and process screen frame"""
@@ -71,34 +207,71 @@ class VideoManager:
             return None
 
         try:
-            sct = mss.mss()
-            monitor = sct.monitors[1] if len(sct.monitors) > 1 else sct.monitors[0]
+            sct, monitor = self._get_sct()
             screenshot = sct.grab(monitor)
 
-            img = PIL.Image.frombytes("RGB", screenshot.size, screenshot.bgra, "raw", "BGRX")
-            img.thumbnail(Config.MAX_SCREEN_SIZE, PIL.Image.Resampling.LANCZOS)
+            # Zero-copy BGRA view of the grab buffer (.bgra would copy it)
+            image = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(
+                screenshot.height, screenshot.width, 4
+            )
 
-            image_io = io.BytesIO()
-            img.save(image_io, format="jpeg", quality=Config.SCREEN_QUALITY, optimize=True)
-            image_io.seek(0)
+            # Skip encoding when the screen has not visibly changed since the last frame sent
+            # Compare BGR only; alpha never changes and would dilute the difference
+            thumb = cv2.cvtColor(
+                cv2.resize(image, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGRA2BGR
+            )
+            last_thumb = self._last_screen_thumb
+            if last_thumb is not None:
+                diff = cv2.absdiff(thumb, last_thumb).max(axis=2)
+                if np.count_nonzero(diff > self._screen_change_delta) < self._screen_change_min_pixels:
+                    return None
 
-            mime_type = "image/jpeg"
-            image_bytes = image_io.read()
-            return {"mime_type": mime_type, "data": base64.b64encode(image_bytes).decode()}
+            image_bytes = _encode_jpeg(
+                image,
+                self._max_screen_size,
+                self._screen_quality,
+                optimize=True,
+            )
+            if image_bytes is None:
+                return None
+
+            self._last_screen_thumb = thumb
+            return types.Blob(mime_type="image/jpeg", data=image_bytes)
         except Exception as e:
             print(f"❌ Error capturing screen: {e}")
             return None
 
     async def get_screen(self):
         """Screen capture loop"""
+        loop = asyncio.get_running_loop()
         while True:
             try:
                 if self.screen_enabled:
-                    frame = await asyncio.to_thread(self._get_screen)
+                    frame = await loop.run_in_executor(self._screen_executor, self._get_screen)
                     if frame:
-                        await self.out_queue.put(frame)
+                        # Sending inline means a slow uplink also delays the next grab
+                        await self.session.send(input=frame)
 
-                await asyncio.sleep(Config.SCREEN_CAPTURE_INTERVAL)
+                await asyncio.sleep(self.config.SCREEN_CAPTURE_INTERVAL)
             except Exception as e:
                 print(f"❌ Error in get_screen: {e}")
                 await asyncio.sleep(1.0)
+
+    async def aclose(self):
+        """Stop capture tasks and release screen capture resources"""
+        self.session = None  # Keeps late toggles from starting new tasks
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Let an in-flight grab finish before its mss instance is closed
+        await asyncio.to_thread(self._screen_executor.shutdown, True)
+
+        for sct in self._sct_instances:
+            try:
+                sct.close()
+            except Exception as e:
+                print(f"❌ Error closing screen capture: {e}")
+        self._sct_instances.clear()